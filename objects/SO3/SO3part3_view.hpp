@@ -13,6 +13,7 @@
 #define _SO3part3_view
 
 //#include "CtensorB.hpp"
+#include "GElib_base.hpp"
 #include "Ctensor3_view.hpp"
 #include "SO3part2_view.hpp"
 //#include "SO3_CGbank.hpp"
@@ -87,6 +88,21 @@ namespace GElib{
   public: // ---- Conversions ------------------------------------------------------------------------------
 
 
+    #ifdef _WITH_ATEN
+
+    // View of a real tensor of shape [2,b,2l+1,n] holding the real and imaginary parts in separate planes. 
+    // Only supported on the CPU, since the CUDA kernels assume interleaved complex storage.
+    static SO3part3_view planar(const at::Tensor& T){
+      if(T.is_cuda()) GELIB_ERROR("Planar SO3part views are only supported on the CPU");
+      if(T.scalar_type()!=at::kFloat) GELIB_ERROR("Planar SO3part views must be float tensors");
+      if(T.dim()!=4 || T.size(0)!=2) GELIB_ERROR("Planar SO3part views must be of shape [2,b,2l+1,n]");
+      float* p=T.data_ptr<float>();
+      return SO3part3_view(p,p+T.stride(0),T.size(1),T.size(2),T.size(3),
+	T.stride(1),T.stride(2),T.stride(3),0);
+    }
+
+    #endif 
+
 
   public: // ---- Access ------------------------------------------------------------------------------------
 
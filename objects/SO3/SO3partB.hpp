@@ -19,10 +19,13 @@
 #include "SO3part_addCGproductFn.hpp"
 #include "SO3part_addCGproduct_back0Fn.hpp"
 #include "SO3part_addCGproduct_back1Fn.hpp"
+#include "SO3part_addCGproduct_backFn.hpp"
+#include "SO3part_addCGproduct_mixedFn.hpp"
 
 #include "SO3part_addBlockedCGproductFn.hpp"
 #include "SO3part_addBlockedCGproduct_back0Fn.hpp"
 #include "SO3part_addBlockedCGproduct_back1Fn.hpp"
+#include "SO3part_addBlockedCGproduct_backFn.hpp"
 
 #include "SO3part_addCGsquareFn.hpp"
 
@@ -94,7 +97,7 @@ namespace GElib{
       return SO3partB(1,l,n,cnine::fill_gaussian());}
 
     static SO3partB raw(const int b, const int l, const int n,  const int _dev=0){
-      return SO3partB(b,l,n,cnine::fill_raw());}
+      return SO3partB(b,l,n,cnine::fill_raw(),_dev);}
     static SO3partB zero(const int b, const int l, const int n,  const int _dev=0){
       return SO3partB(b,l,n,cnine::fill_zero(),_dev);}
     static SO3partB gaussian(const int b, const int l, const int n,  const int _dev=0){
@@ -102,7 +105,7 @@ namespace GElib{
 
 
     static SO3partB Fraw(const int b, const int l, const int _dev=0){
-      return SO3partB(1,l,2*l+1,cnine::fill_raw());}
+      return SO3partB(b,l,2*l+1,cnine::fill_raw(),_dev);}
     static SO3partB Fzero(const int b, const int l, const int _dev=0){
       return SO3partB(b,l,2*l+1,cnine::fill_zero(),_dev);}
     static SO3partB Fgaussian(const int b, const int l, const int _dev=0){
@@ -281,7 +284,9 @@ namespace GElib{
       float length=sqrt(x*x+y*y+z*z); 
       float len2=sqrt(x*x+y*y);
       if(len2==0 || std::isnan(x/len2) || std::isnan(y/len2)){
+	// on the z axis only m=0 is nonzero, and Y_l^0 picks up a factor (-1)^l at the south pole
 	float a=sqrt(((float)(2*l+1))/(M_PI*4.0));
+	if(z<0 && l%2==1) a=-a;
 	for(int i=0; i<B; i++)
 	  for(int j=0; j<n; j++)
 	    v.inc(i,l,j,a);
@@ -328,8 +333,8 @@ namespace GElib{
 
 	  if(len2==0 || std::isnan(vx/len2) || std::isnan(vy/len2)){
 	    float a=sqrt(((float)(2*l+1))/(M_PI*4.0));
-	    for(int j=0; j<n; j++)
-	      v.inc(b,l,j,a);
+	    if(vz<0 && l%2==1) a=-a;
+	    v.inc(b,l,j,a);
 	  }else{
 
 	    complex<float> cphi(vx/len2,vy/len2);
@@ -369,9 +374,10 @@ namespace GElib{
 	float len2=sqrt(vx*vx+vy*vy);
 	if(len2==0 || std::isnan(vx/len2) || std::isnan(vy/len2)){
 	  float a=sqrt(((float)(2*l+1))/(M_PI*4.0));
+	  if(vz<0 && l%2==1) a=-a;
 	  for(int j=0; j<n; j++)
 	    v.inc(b,l,j,a);
-	  return;
+	  continue;
 	}
 	complex<float> cphi(vx/len2,vy/len2);
 	cnine::Gtensor<float> P=SO3_sphGen(l,vz/length);
@@ -406,6 +412,18 @@ namespace GElib{
       SO3part_addCGproductFn()(*this,x,y,_offs);
     }
 
+    // Like add_CGproduct, but overwrites the channels _offs,...,_offs+x.getn()*y.getn()-1 instead of adding to them
+    void set_CGproduct(const SO3partB& x, const SO3partB& y, const int _offs=0){
+      SO3part_addCGproductFn()(*this,x,y,_offs,0);
+    }
+
+#ifdef _WITH_ATEN
+    // x and y are half or bfloat16 tensors of shape [b,2l+1,n,2], the product is accumulated in single precision
+    void add_CGproduct_mixed(const at::Tensor& x, const at::Tensor& y, const int _offs=0){
+      SO3part_addCGproduct_mixedFn()(*this,x,y,_offs);
+    }
+#endif
+
     void add_CGproduct_back0(const SO3partB& g, const SO3partB& y, const int _offs=0){
       SO3part_addCGproduct_back0Fn()(*this,g,y,_offs);
     }
@@ -414,6 +432,10 @@ namespace GElib{
       SO3part_addCGproduct_back1Fn()(*this,g,x,_offs);
     }
 
+    static void add_CGproduct_back(SO3partB& xg, SO3partB& yg, const SO3partB& g, const SO3partB& x, const SO3partB& y, const int _offs=0){
+      SO3part_addCGproduct_backFn()(xg,yg,g,x,y,_offs);
+    }
+
 
     // ---- BlockedCGproduct 
 
@@ -438,6 +460,11 @@ namespace GElib{
       SO3part_addBlockedCGproduct_back1Fn()(*this,g,x,bsize,_offs);
     }
 
+    static void add_BlockedCGproduct_back(SO3partB& xg, SO3partB& yg, const SO3partB& g, const SO3partB& x, const SO3partB& y, 
+      const int bsize, const int _offs=0){
+      SO3part_addBlockedCGproduct_backFn()(xg,yg,g,x,y,bsize,_offs);
+    }
+
 
     // ---- DiagCGproduct 
 
@@ -458,6 +485,10 @@ namespace GElib{
       add_BlockedCGproduct_back1(g,x,1,_offs);
     }
 
+    static void add_DiagCGproduct_back(SO3partB& xg, SO3partB& yg, const SO3partB& g, const SO3partB& x, const SO3partB& y, const int _offs=0){
+      add_BlockedCGproduct_back(xg,yg,g,x,y,1,_offs);
+    }
+
 
     // ---- CGsquare
 
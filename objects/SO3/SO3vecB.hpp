@@ -219,6 +219,18 @@ namespace GElib{
       return R;
     }
 
+    // View a packed complex [b,sum_l offsets[l+1]-offsets[l]] tensor as an SO3vecB, part l occupying 
+    // columns offsets[l],...,offsets[l+1]-1
+    static SO3vecB view_packed(at::Tensor& buf, const vector<int>& offsets){
+      SO3vecB r;
+      const int b=buf.size(0);
+      for(int l=0; l<offsets.size()-1; l++){
+	at::Tensor p=buf.narrow(1,offsets[l],offsets[l+1]-offsets[l]).view({b,2*l+1,(offsets[l+1]-offsets[l])/(2*l+1)});
+	r.parts.push_back(static_cast<SO3partB*>(cnine::CtensorB::viewp(p)));
+      }
+      return r;
+    }
+
 #endif
 
  
@@ -733,6 +745,58 @@ namespace GElib{
     }
 
 
+  public: // ---- Spherical harmonics -----------------------------------------------------------------------
+
+
+    // Add the spherical harmonics of each column of the b x 3 x n tensor x to parts l=0,...,maxl. 
+    // The Legendre recurrence is only evaluated once per point for all l.
+
+    void add_spharm(const cnine::RtensorA& x){
+      const int L=get_maxl();
+      const int B=getb();
+      assert(x.dims.size()==3);
+      assert(x.dims[0]==B);
+      assert(x.dims[1]==3);
+      const int n=x.dims[2];
+
+      vector<cnine::Ctensor3_view> v;
+      for(int l=0; l<=L; l++){
+	assert(parts[l]->getn()==n);
+	v.push_back(parts[l]->view3());
+      }
+
+      vector<complex<float> > phase(L+1);
+      for(int b=0; b<B; b++){
+	for(int j=0; j<n; j++){
+	  float vx=x(b,0,j);
+	  float vy=x(b,1,j);
+	  float vz=x(b,2,j);
+	  float length=sqrt(vx*vx+vy*vy+vz*vz); 
+	  float len2=sqrt(vx*vx+vy*vy);
+
+	  complex<float> cphi(1.0,0);
+	  if(len2>0 && !std::isnan(vx/len2) && !std::isnan(vy/len2)) cphi=complex<float>(vx/len2,vy/len2);
+	  float ct=1.0;
+	  if(length>0) ct=vz/length;
+
+	  cnine::Gtensor<float> P=SO3_sphGen(L,ct);
+	  phase[0]=complex<float>(1.0,0);
+	  for(int m=1; m<=L; m++)
+	    phase[m]=cphi*phase[m-1];
+
+	  for(int l=0; l<=L; l++){
+	    for(int m=0; m<=l; m++){
+	      complex<float> a=phase[m]*complex<float>(P(l,m));
+	      complex<float> aa=complex<float>(1-2*(m%2))*std::conj(a);
+	      v[l].inc(b,l+m,j,a);
+	      if(m>0) v[l].inc(b,l-m,j,aa);
+	    }
+	  }
+	}
+      }
+    }
+
+
   public: // ---- FFT ---------------------------------------------------------------------------------------
 
 
@@ -0,0 +1,102 @@
+// This file is part of GElib, a C++/CUDA library for group
+// equivariant tensor operations. 
+// 
+// Copyright (c) 2022, Imre Risi Kondor
+//
+// This Source Code Form is subject to the terms of the Mozilla
+// Public License v. 2.0. If a copy of the MPL was not distributed
+// with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+#ifndef _SO3part_CGinnerLoop
+#define _SO3part_CGinnerLoop
+
+#if defined(__AVX2__) && defined(__FMA__)
+#include <immintrin.h>
+#elif defined(__ARM_NEON)
+#include <arm_neon.h>
+#endif
+
+
+namespace GElib{
+
+
+  // Innermost loop of the CPU CG-products: r_j += (xr + i xi) * y_j for j=0,...,N-1. 
+  // rr,rc and yr,yc point to the real and imaginary parts of r and y, and rs and ys are the strides 
+  // between consecutive fragments. If the real and imaginary parts are stored in separate planes with 
+  // unit stride, or interleaved with stride 2, the loop is vectorized with AVX2/FMA or NEON intrinsics. 
+
+  inline void SO3part_CGinnerLoop(float* rr, float* rc, const int rs, const float* yr, const float* yc, const int ys, 
+    const float xr, const float xi, const int N){
+
+    int n=0;
+
+#if defined(__AVX2__) && defined(__FMA__)
+    const __m256 XR=_mm256_set1_ps(xr);
+    const __m256 XI=_mm256_set1_ps(xi);
+    if(rs==1 && ys==1){
+      for(; n+8<=N; n+=8){
+	__m256 a=_mm256_loadu_ps(yr+n);
+	__m256 b=_mm256_loadu_ps(yc+n);
+	__m256 re=_mm256_loadu_ps(rr+n);
+	__m256 im=_mm256_loadu_ps(rc+n);
+	re=_mm256_fmadd_ps(XR,a,re);
+	re=_mm256_fnmadd_ps(XI,b,re);
+	im=_mm256_fmadd_ps(XR,b,im);
+	im=_mm256_fmadd_ps(XI,a,im);
+	_mm256_storeu_ps(rr+n,re);
+	_mm256_storeu_ps(rc+n,im);
+      }
+    }
+    else if(rs==2 && ys==2 && rc==rr+1 && yc==yr+1){
+      for(; n+4<=N; n+=4){
+	__m256 y=_mm256_loadu_ps(yr+2*n);
+	__m256 t=_mm256_mul_ps(XI,_mm256_permute_ps(y,0xB1));
+	__m256 r=_mm256_loadu_ps(rr+2*n);
+	r=_mm256_add_ps(r,_mm256_fmaddsub_ps(XR,y,t));
+	_mm256_storeu_ps(rr+2*n,r);
+      }
+    }
+#elif defined(__ARM_NEON)
+    if(rs==1 && ys==1){
+      const float32x4_t XR=vdupq_n_f32(xr);
+      const float32x4_t XI=vdupq_n_f32(xi);
+      for(; n+4<=N; n+=4){
+	float32x4_t a=vld1q_f32(yr+n);
+	float32x4_t b=vld1q_f32(yc+n);
+	float32x4_t re=vld1q_f32(rr+n);
+	float32x4_t im=vld1q_f32(rc+n);
+	re=vfmaq_f32(re,XR,a);
+	re=vfmsq_f32(re,XI,b);
+	im=vfmaq_f32(im,XR,b);
+	im=vfmaq_f32(im,XI,a);
+	vst1q_f32(rr+n,re);
+	vst1q_f32(rc+n,im);
+      }
+    }
+    else if(rs==2 && ys==2 && rc==rr+1 && yc==yr+1){
+      const float32x4_t XR=vdupq_n_f32(xr);
+      const float32x4_t XI=vdupq_n_f32(xi);
+      for(; n+4<=N; n+=4){
+	float32x4x2_t y=vld2q_f32(yr+2*n);
+	float32x4x2_t r=vld2q_f32(rr+2*n);
+	r.val[0]=vfmaq_f32(r.val[0],XR,y.val[0]);
+	r.val[0]=vfmsq_f32(r.val[0],XI,y.val[1]);
+	r.val[1]=vfmaq_f32(r.val[1],XR,y.val[1]);
+	r.val[1]=vfmaq_f32(r.val[1],XI,y.val[0]);
+	vst2q_f32(rr+2*n,r);
+      }
+    }
+#endif
+
+    for(; n<N; n++){
+      const float a=yr[n*ys];
+      const float b=yc[n*ys];
+      rr[n*rs]+=xr*a-xi*b;
+      rc[n*rs]+=xr*b+xi*a;
+    }
+  }
+
+}
+
+#endif
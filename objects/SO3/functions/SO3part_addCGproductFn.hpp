@@ -15,6 +15,8 @@
 #include "CtensorB.hpp"
 #include "SO3part2_view.hpp"
 #include "SO3part4_view.hpp"
+#include "SO3part_addCGproduct_fixedlFn.hpp"
+#include "SO3part_CGinnerLoop.hpp"
 #include "MultiLoop.hpp"
 #include "GElibTimer.hpp"
 #include "WorkStreamLoop.hpp"
@@ -38,7 +40,10 @@ namespace GElib{
   class SO3part_addCGproductFn{
   public:
 
-    void operator()(const SO3part3_view& _r, const SO3part3_view& _x, const SO3part3_view& _y, const int _offs=0){
+    // If add_flag==0, the CPU path overwrites the corresponding channels of r instead of adding to them
+
+    void operator()(const SO3part3_view& _r, const SO3part3_view& _x, const SO3part3_view& _y, const int _offs=0, 
+      const int add_flag=1){
 
 
       const int l=_r.getl(); 
@@ -106,13 +111,23 @@ namespace GElib{
 	    SO3part2_view x=_x.slice0(b);
 	    SO3part2_view y=_y.slice0(b);
 	    int offs=_offs;
+	    if(add_flag==0){
+	      for(int m=-l; m<=l; m++)
+		for(int n=0; n<N1*N2; n++){
+		  r.ar[m*r.s0+(offs+n)*r.s1]=0;
+		  r.ac[m*r.s0+(offs+n)*r.s1]=0;
+		}
+	    }
+	    if(SO3part_addCGproduct_fixedl(l1,l2,l,r,x,y,C,N1,N2,offs)) return;
 	    
+	    // the n2 loop is innermost and runs over the real and imaginary planes separately
 	    for(int n1=0; n1<N1; n1++){
-	      for(int n2=0; n2<N2; n2++){
-		for(int m1=-l1; m1<=l1; m1++){
-		  for(int m2=std::max(-l2,-l-m1); m2<=std::min(l2,l-m1); m2++){
-		    r.inc(m1+m2,offs+n2,C(m1+l1,m2+l2)*x(m1,n1)*y(m2,n2));
-		  }
+	      for(int m1=-l1; m1<=l1; m1++){
+		complex<float> xv=x(m1,n1);
+		for(int m2=std::max(-l2,-l-m1); m2<=std::min(l2,l-m1); m2++){
+		  const float c=C(m1+l1,m2+l2);
+		  SO3part_CGinnerLoop(r.ar+(m1+m2)*r.s0+offs*r.s1,r.ac+(m1+m2)*r.s0+offs*r.s1,r.s1,
+		    y.ar+m2*y.s0,y.ac+m2*y.s0,y.s1,c*std::real(xv),c*std::imag(xv),N2);
 		}
 	      }
 	      offs+=N2;
@@ -120,7 +135,10 @@ namespace GElib{
 	  });
       }
 
-      else CUDA_STREAM(SO3partB_addCGproduct_cu(_r,_x,_y,_offs,stream));
+      else{
+	if(add_flag==0) GELIB_ERROR("Overwriting CG-product is not implemented on the GPU.");
+	CUDA_STREAM(SO3partB_addCGproduct_cu(_r,_x,_y,_offs,stream));
+      }
 
     }
 
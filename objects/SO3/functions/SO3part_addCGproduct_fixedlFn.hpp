@@ -0,0 +1,104 @@
+// This file is part of GElib, a C++/CUDA library for group
+// equivariant tensor operations. 
+// 
+// Copyright (c) 2022, Imre Risi Kondor
+//
+// This Source Code Form is subject to the terms of the Mozilla
+// Public License v. 2.0. If a copy of the MPL was not distributed
+// with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+#ifndef _SO3part_addCGproduct_fixedlFn
+#define _SO3part_addCGproduct_fixedlFn
+
+#include "GElib_base.hpp"
+#include "SO3part2_view.hpp"
+#include "SO3_CGcoeffs.hpp"
+#include "SO3part_CGinnerLoop.hpp"
+
+#ifdef GELIB_CG_TABLES
+#include "SO3_CGtables.hpp"
+#if defined(GELIB_CG_MAXL) && GELIB_CG_MAXL!=GELIB_CG_TABLES_MAXL
+#error "SO3_CGtables.hpp is out of date, rerun python/tools/gen_cg_tables.py with --maxl GELIB_CG_MAXL"
+#endif
+#endif
+
+
+namespace GElib{
+
+
+  // CPU CG-product kernel for one batch slice with l1, l2 and l fixed at compile time, so that the 
+  // loops over m1 and m2 have constant trip counts and can be fully unrolled by the compiler. 
+  // If the generated tables are available the coefficients are compile time constants too. 
+
+  template<int L1, int L2, int L>
+  inline void SO3part_addCGproduct_fixedl(const SO3part2_view& r, const SO3part2_view& x, const SO3part2_view& y, 
+    const SO3_CGcoeffs<float>& C, const int N1, const int N2, int offs){
+
+    for(int n1=0; n1<N1; n1++){
+      for(int m1=-L1; m1<=L1; m1++){
+	const float xr0=x.ar[m1*x.s0+n1*x.s1];
+	const float xi0=x.ac[m1*x.s0+n1*x.s1];
+	for(int m2=std::max(-L2,-L-m1); m2<=std::min(L2,L-m1); m2++){
+#ifdef GELIB_CG_TABLES
+	  const float c=SO3_CGtable<L1,L2,L>::get(m1+L1,m2+L2);
+#else
+	  const float c=C(m1+L1,m2+L2);
+#endif
+	  SO3part_CGinnerLoop(r.ar+(m1+m2)*r.s0+offs*r.s1,r.ac+(m1+m2)*r.s0+offs*r.s1,r.s1,
+	    y.ar+m2*y.s0,y.ac+m2*y.s0,y.s1,c*xr0,c*xi0,N2);
+	}
+      }
+      offs+=N2;
+    }
+  }
+
+
+#define GELIB_CG_FIXEDL_CASE(a,b,c) case a*10000+b*100+c: SO3part_addCGproduct_fixedl<a,b,c>(r,x,y,C,N1,N2,offs); return true;
+
+
+  // Dispatch to a specialized kernel if one exists for (l1,l2,l). Returns false otherwise.
+
+  inline bool SO3part_addCGproduct_fixedl(const int l1, const int l2, const int l, 
+    const SO3part2_view& r, const SO3part2_view& x, const SO3part2_view& y, 
+    const SO3_CGcoeffs<float>& C, const int N1, const int N2, const int offs){
+
+#ifdef GELIB_CG_TABLES
+    if(l1>GELIB_CG_TABLES_MAXL || l2>GELIB_CG_TABLES_MAXL) return false;
+
+    switch(l1*10000+l2*100+l){
+      GELIB_CG_TABLES_TRIPLES(GELIB_CG_FIXEDL_CASE)
+    }
+#else
+    if(l1>2 || l2>2) return false;
+
+    switch(l1*10000+l2*100+l){
+      GELIB_CG_FIXEDL_CASE(0,0,0)
+      GELIB_CG_FIXEDL_CASE(0,1,1)
+      GELIB_CG_FIXEDL_CASE(0,2,2)
+      GELIB_CG_FIXEDL_CASE(1,0,1)
+      GELIB_CG_FIXEDL_CASE(1,1,0)
+      GELIB_CG_FIXEDL_CASE(1,1,1)
+      GELIB_CG_FIXEDL_CASE(1,1,2)
+      GELIB_CG_FIXEDL_CASE(1,2,1)
+      GELIB_CG_FIXEDL_CASE(1,2,2)
+      GELIB_CG_FIXEDL_CASE(1,2,3)
+      GELIB_CG_FIXEDL_CASE(2,0,2)
+      GELIB_CG_FIXEDL_CASE(2,1,1)
+      GELIB_CG_FIXEDL_CASE(2,1,2)
+      GELIB_CG_FIXEDL_CASE(2,1,3)
+      GELIB_CG_FIXEDL_CASE(2,2,0)
+      GELIB_CG_FIXEDL_CASE(2,2,1)
+      GELIB_CG_FIXEDL_CASE(2,2,2)
+      GELIB_CG_FIXEDL_CASE(2,2,3)
+      GELIB_CG_FIXEDL_CASE(2,2,4)
+    }
+#endif
+    return false;
+  }
+
+#undef GELIB_CG_FIXEDL_CASE
+
+}
+
+#endif
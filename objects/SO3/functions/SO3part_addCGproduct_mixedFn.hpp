@@ -0,0 +1,110 @@
+// This file is part of GElib, a C++/CUDA library for group
+// equivariant tensor operations. 
+// 
+// Copyright (c) 2022, Imre Risi Kondor
+//
+// This Source Code Form is subject to the terms of the Mozilla
+// Public License v. 2.0. If a copy of the MPL was not distributed
+// with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+
+#ifndef _SO3part_addCGproduct_mixedFn
+#define _SO3part_addCGproduct_mixedFn
+
+#ifdef _WITH_ATEN
+
+#include "GElib_base.hpp"
+#include "SO3part3_view.hpp"
+#include "SO3_CGbank.hpp"
+#include "SO3part_CGinnerLoop.hpp"
+#include "MultiLoop.hpp"
+
+extern GElib::SO3_CGbank SO3_cgbank;
+
+
+namespace GElib{
+
+
+  // CG-product of two SO3parts stored in half or bfloat16 precision as real [b,2l+1,n,2] tensors. 
+  // The inputs are converted to float as they are loaded and the product is accumulated into r in 
+  // single precision. 
+
+  class SO3part_addCGproduct_mixedFn{
+  public:
+
+    void operator()(const SO3part3_view& _r, const at::Tensor& _x, const at::Tensor& _y, const int _offs=0){
+      if(_x.scalar_type()!=_y.scalar_type()) 
+	GELIB_ERROR("The arguments of a mixed precision CG-product must have the same dtype");
+      if(_x.scalar_type()==at::kHalf) {apply<at::Half>(_r,_x,_y,_offs); return;}
+      if(_x.scalar_type()==at::kBFloat16) {apply<at::BFloat16>(_r,_x,_y,_offs); return;}
+      GELIB_ERROR("The arguments of a mixed precision CG-product must be half or bfloat16 tensors");
+    }
+
+
+    template<typename TYPE>
+    void apply(const SO3part3_view& _r, const at::Tensor& _x, const at::Tensor& _y, const int _offs){
+
+      if(_x.dim()!=4 || _x.size(3)!=2 || _y.dim()!=4 || _y.size(3)!=2)
+	GELIB_ERROR("The arguments of a mixed precision CG-product must be of shape [b,2l+1,n,2]");
+      if(_r.dev>0 || _x.is_cuda() || _y.is_cuda()) 
+	GELIB_ERROR("Mixed precision CG-product is only implemented on the CPU");
+
+      const int l=_r.getl(); 
+      const int l1=(_x.size(1)-1)/2; 
+      const int l2=(_y.size(1)-1)/2;
+ 
+      const int N1=_x.size(2);
+      const int N2=_y.size(2);
+      const int B=_x.size(0);
+
+      if(_y.size(0)!=B || _r.n0!=B) GELIB_ERROR("Batch dimension mismatch");
+      assert(_offs+N1*N2<=_r.n2);
+      assert(l>=abs(l1-l2) && l<=l1+l2);
+
+      const TYPE* xarr=_x.data_ptr<TYPE>();
+      const TYPE* yarr=_y.data_ptr<TYPE>();
+      const int xs0=_x.stride(0), xs1=_x.stride(1), xs2=_x.stride(2), xs3=_x.stride(3);
+      const int ys0=_y.stride(0), ys1=_y.stride(1), ys2=_y.stride(2), ys3=_y.stride(3);
+
+      auto& C=SO3_cgbank.getf(CGindex(l1,l2,l));
+      cnine::MultiLoop(B,[&](const int b){
+	  SO3part2_view r=_r.slice0(b);
+	  const TYPE* x=xarr+b*xs0+l1*xs1;
+	  const TYPE* y=yarr+b*ys0+l2*ys1;
+
+	  // y is converted to single precision once per batch, in the same layout as r (interleaved or planar), 
+	  // so that the inner loop can take its vectorized branch 
+	  const bool interleaved=(r.ac==r.ar+1);
+	  const int ystride=interleaved?2:1;
+	  vector<float> ybuf(2*(2*l2+1)*N2);
+	  float* yr=ybuf.data()+l2*2*N2;
+	  float* yi=interleaved?yr+1:yr+N2;
+	  for(int m2=-l2; m2<=l2; m2++)
+	    for(int n2=0; n2<N2; n2++){
+	      yr[m2*2*N2+n2*ystride]=static_cast<float>(y[m2*ys1+n2*ys2]);
+	      yi[m2*2*N2+n2*ystride]=static_cast<float>(y[m2*ys1+n2*ys2+ys3]);
+	    }
+
+	  int offs=_offs;
+	  for(int n1=0; n1<N1; n1++){
+	    for(int m1=-l1; m1<=l1; m1++){
+	      const float xr=static_cast<float>(x[m1*xs1+n1*xs2]);
+	      const float xi=static_cast<float>(x[m1*xs1+n1*xs2+xs3]);
+	      for(int m2=std::max(-l2,-l-m1); m2<=std::min(l2,l-m1); m2++){
+		const float c=C(m1+l1,m2+l2);
+		SO3part_CGinnerLoop(r.ar+(m1+m2)*r.s0+offs*r.s1,r.ac+(m1+m2)*r.s0+offs*r.s1,r.s1,
+		  yr+m2*2*N2,yi+m2*2*N2,ystride,c*xr,c*xi,N2);
+	      }
+	    }
+	    offs+=N2;
+	  }
+	});
+    }
+
+  };
+
+}
+
+#endif 
+
+#endif
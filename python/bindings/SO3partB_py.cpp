@@ -42,6 +42,10 @@ py::class_<SO3partB>(m,"SO3partB",
 
 //.def(pybind11::init([](const at::Tensor& x){return SO3partB(cnine::CtensorB(x));}))
   .def_static("view",[](at::Tensor& x){return SO3partB(cnine::CtensorB::view(x));})
+  .def_static("zeros_like_view",[](at::Tensor& x){
+      at::Tensor r=at::zeros_like(x);
+      return py::make_tuple(r,SO3partB(cnine::CtensorB::view(r)));},
+    "Allocate a zero tensor of the same shape as x and return it together with an SO3partB view of it.")
 //.def("torch",&cnine::CtensorObj::torch)
   .def("torch",[](const SO3partB& x){return x.torch();})
 
@@ -82,12 +86,28 @@ py::class_<SO3partB>(m,"SO3partB",
       obj.add_spharmB(X);})
 
   .def("addCGproduct",&SO3partB::add_CGproduct,py::arg("x"),py::arg("y"),py::arg("offs")=0)
+  .def("setCGproduct",&SO3partB::set_CGproduct,py::arg("x"),py::arg("y"),py::arg("offs")=0)
+  .def("addCGproduct_mixed",&SO3partB::add_CGproduct_mixed,py::arg("x"),py::arg("y"),py::arg("offs")=0)
   .def("addCGproduct_back0",&SO3partB::add_CGproduct_back0,py::arg("g"),py::arg("y"),py::arg("offs")=0)
   .def("addCGproduct_back1",&SO3partB::add_CGproduct_back1,py::arg("g"),py::arg("x"),py::arg("offs")=0)
+  .def_static("addCGproduct_back",&SO3partB::add_CGproduct_back,
+    py::arg("xg"),py::arg("yg"),py::arg("g"),py::arg("x"),py::arg("y"),py::arg("offs")=0)
+
+  .def_static("addCGproduct_planar",[](at::Tensor& r, at::Tensor& x, at::Tensor& y, const int offs){
+      SO3part_addCGproductFn()(SO3part3_view::planar(r),SO3part3_view::planar(x),SO3part3_view::planar(y),offs);},
+    py::arg("r"),py::arg("x"),py::arg("y"),py::arg("offs")=0)
+  .def_static("addCGproduct_back0_planar",[](at::Tensor& xg, at::Tensor& g, at::Tensor& y, const int offs){
+      SO3part_addCGproduct_back0Fn()(SO3part3_view::planar(xg),SO3part3_view::planar(g),SO3part3_view::planar(y),offs);},
+    py::arg("xg"),py::arg("g"),py::arg("y"),py::arg("offs")=0)
+  .def_static("addCGproduct_back1_planar",[](at::Tensor& yg, at::Tensor& g, at::Tensor& x, const int offs){
+      SO3part_addCGproduct_back1Fn()(SO3part3_view::planar(yg),SO3part3_view::planar(g),SO3part3_view::planar(x),offs);},
+    py::arg("yg"),py::arg("g"),py::arg("x"),py::arg("offs")=0)
 
   .def("addDiagCGproduct",&SO3partB::add_DiagCGproduct,py::arg("x"),py::arg("y"),py::arg("offs")=0)
   .def("addDiagCGproduct_back0",&SO3partB::add_DiagCGproduct_back0,py::arg("g"),py::arg("y"),py::arg("offs")=0)
   .def("addDiagCGproduct_back1",&SO3partB::add_DiagCGproduct_back1,py::arg("g"),py::arg("x"),py::arg("offs")=0)
+  .def_static("addDiagCGproduct_back",&SO3partB::add_DiagCGproduct_back,
+    py::arg("xg"),py::arg("yg"),py::arg("g"),py::arg("x"),py::arg("y"),py::arg("offs")=0)
 
   .def("apply",&SO3partB::rotate)
 
@@ -47,6 +47,8 @@ py::class_<SO3vecB>(m,"SO3vecB",
       return r;
     })
 
+  .def_static("view_packed",&SO3vecB::view_packed, py::arg("buf"), py::arg("offsets"))
+
   .def("torch",&SO3vecB::torch)
 
   .def("add_to_grad",&SO3vecB::add_to_grad)
@@ -77,8 +79,19 @@ py::class_<SO3vecB>(m,"SO3vecB",
   .def("addFproduct_back0",&SO3vecB::add_Fproduct_back0,py::arg("g"),py::arg("y"),py::arg("method")=0)
   .def("addFproduct_back1",&SO3vecB::add_Fproduct_back1,py::arg("g"),py::arg("x"))
 
+  .def("add_spharm",[](SO3vecB& obj, at::Tensor& _X){
+      RtensorA X=RtensorA::view(_X);
+      obj.add_spharm(X);})
+
   .def("add_iFFT_to",&SO3vecB::add_iFFT_to)
+  .def_static("add_iFFT_to_packed",[](at::Tensor& v, at::Tensor& f, vector<int>& offsets){
+      cnine::CtensorB R=cnine::CtensorB::view(f);
+      SO3vecB::view_packed(v,offsets).add_iFFT_to(R);
+    }, py::arg("v"), py::arg("f"), py::arg("offsets"))
   .def("add_FFT",&SO3vecB::add_FFT)
+  .def_static("add_FFT_packed",[](at::Tensor& v, at::Tensor& f, vector<int>& offsets){
+      SO3vecB::view_packed(v,offsets).add_FFT(cnine::CtensorB::view(f));
+    }, py::arg("v"), py::arg("f"), py::arg("offsets"))
 
   .def("device",&SO3vecB::get_device)
   .def("to",&SO3vecB::to_device)
@@ -1,4 +1,8 @@
 import os
+import sys
+import subprocess
+import platform
+import tempfile
 import torch
 from setuptools import setup
 from setuptools import find_packages
@@ -9,15 +13,57 @@ from os.path import basename
 from glob import glob
 
 
+def generate_cg_tables(maxl):
+    """Write the compile time CG coefficient tables to include/SO3_CGtables.hpp."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    subprocess.check_call([sys.executable, os.path.join(here, 'tools', 'gen_cg_tables.py'),
+                           '--maxl', str(maxl),
+                           '--out', os.path.join(here, '..', 'include', 'SO3_CGtables.hpp')])
+
+
+def compiler_accepts(flags):
+    """Check whether the C++ compiler accepts the given flags by compiling an empty translation unit."""
+    cxx = os.environ.get('CXX', 'c++')
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'probe.cpp')
+        with open(src, 'w') as f:
+            f.write('int main(){return 0;}\n')
+        try:
+            return subprocess.call([cxx] + flags + ['-c', src, '-o', os.path.join(tmp, 'probe.o')],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) == 0
+        except OSError:
+            return False
+
+
+def arch_flags():
+    """Architecture flags for the build host, so that the vectorized CPU kernels use AVX2/FMA or NEON."""
+    machine = platform.machine().lower()
+    if machine in ('x86_64', 'amd64'):
+        for flags in (['-march=native'], ['-march=haswell']):
+            if compiler_accepts(flags):
+                return flags
+    if machine in ('arm64', 'aarch64'):
+        if compiler_accepts(['-mcpu=native']):
+            return ['-mcpu=native']
+    return []
+
+
 def main():
 
     # --- User settings ------------------------------------------------------------------------------------------
     # os.environ['CUDA_HOME']='/usr/local/cuda'
-    #os.environ["CC"] = "clang"
 
     compile_with_cuda = False 
     # compile_with_cuda = False
 
+    # CG coefficients of all products with l1,l2<=cg_tables_maxl are baked into the binary at build time.
+    # Each (l1,l2,l) gets its own fully unrolled kernel: maxl=4 gives 85 kernels, maxl=8 would give 489 
+    # with roughly 20 times the unrolled code, which makes the build much slower for little benefit.
+    cg_tables_maxl = 4
+
+    # Optimize for the instruction set of the build host (falls back to -march=haswell on x86-64 if needed)
+    native_arch = True
+
     copy_warnings = False
     torch_convert_warnings = True
 
@@ -30,6 +76,7 @@ def main():
 #        compile_with_cuda=False
 
     cwd = os.getcwd()
+
     cnine_folder = "/../../cnine/"
     ext_cuda_folder = "../../GElib-cuda/cuda/"
 
@@ -73,7 +120,9 @@ def main():
                          '-DCNINE_SIZE_CHECKING',
                          '-DCNINE_DEVICE_CHECKING',
                          '-DGELIB_RANGE_CHECKING',
-                         '-DWITH_FAKE_GRAD'
+                         '-DWITH_FAKE_GRAD',
+                         '-DGELIB_CG_TABLES',
+                         '-DGELIB_CG_MAXL='+str(cg_tables_maxl)
                          ]
 
     _nvcc_compile_args = ['-D_WITH_CUDA',
@@ -103,9 +152,16 @@ def main():
     if compile_with_cuda:
         _cxx_compile_args.extend(['-D_WITH_CUDA', '-D_WITH_CUBLAS'])
 
+    _cxx_compile_args.extend(['-O3', '-flto'])
+    _link_args = ['-flto']
+
+    if native_arch:
+        _cxx_compile_args.extend(arch_flags())
+
     _depends = ['setup.py',
                 'src/gelib.cpp',
-                'bindings/*.cpp'
+                'bindings/*.cpp',
+                'tools/gen_cg_tables.py'
     #             'build/*/*'
                 ]
 
@@ -134,6 +190,7 @@ def main():
             extra_compile_args={
             'nvcc': _nvcc_compile_args,
             'cxx': _cxx_compile_args},
+            extra_link_args=_link_args,
             depends=_depends
         )]
     else:
@@ -142,9 +199,18 @@ def main():
                                     # sources=sources,
                                     extra_compile_args={
             'cxx': _cxx_compile_args},
+            extra_link_args=_link_args,
             depends=_depends
         )]
 
+    # ---- Pre-build step ----------------------------------------------------------------------------------------
+
+    # the CG tables are only generated when the extension is actually built, not for clean, --help etc.
+    class BuildExtensionWithCGtables(BuildExtension):
+        def run(self):
+            generate_cg_tables(cg_tables_maxl)
+            super().run()
+
     setup(name='gelib',
           ext_modules=ext_modules,
           packages=find_packages('src'),
@@ -152,7 +218,7 @@ def main():
           py_modules=[splitext(basename(path))[0] for path in glob('src/*.py')],
           include_package_data=True,
           zip_safe=False,
-          cmdclass={'build_ext': BuildExtension})
+          cmdclass={'build_ext': BuildExtensionWithCGtables})
 
     # print("Compilation finished:", time.ctime(time.time()))
 
@@ -231,8 +231,7 @@ class SO3mvec_CGproductFn(torch.autograd.Function):
         b=args[0].size(0)
         k=args[0].size(1)
         tau = CGproductType(tau_typem(args[0:k1]), tau_typem(args[k1:k1+k2]), maxl)
-        dev = int(args[0].is_cuda)
-        r = MakeZeroSO3mparts(b,k,tau,dev)
+        r = MakeZeroSO3mparts(b,k,tau,device=args[0].device)
 
         _x = _SO3mvec.view(args[0:k1])
         _y = _SO3mvec.view(args[k1:k1+k2])
@@ -280,8 +279,7 @@ class SO3mvec_DiagCGproductFn(torch.autograd.Function):
         b=args[0].size(0)
         k=args[0].size(1)
         tau=DiagCGproductType(tau_typem(args[0:k1]), tau_typem(args[k1:k1+k2]), maxl)
-        dev=int(args[0].is_cuda)
-        r = MakeZeroSO3mparts(b,k,tau, dev)
+        r = MakeZeroSO3mparts(b,k,tau,device=args[0].device)
 
         _x = _SO3mvec.view(args[0:k1])
         _y = _SO3mvec.view(args[k1:k1+k2])
@@ -331,9 +329,8 @@ class SO3mvec_FproductFn(torch.autograd.Function):
             maxl = k1+k2-2
         else:
             maxl = _maxl
-        dev = int(args[0].is_cuda)
 
-        r = makeZeroSO3Fmparts(b,k,maxl,dev)
+        r = makeZeroSO3Fmparts(b,k,maxl,device=args[0].device)
 
         _x = _SO3mvec.view(args[0:k1])
         _y = _SO3mvec.view(args[k1:k1+k2])
@@ -383,9 +380,8 @@ class SO3mvec_FmodsqFn(torch.autograd.Function):
             maxl = k1+k1-2
         else:
             maxl = _maxl
-        dev = int(args[0].is_cuda)
 
-        r=makeZeroSO3Fmparts(b,k,maxl,dev)
+        r=makeZeroSO3Fmparts(b,k,maxl,device=args[0].device)
 
         _x = _SO3mvec.view(args[0:k1])
         _r = _SO3mvec.view(r)
@@ -530,17 +526,17 @@ def DiagCGproductType(x, y, maxl=-1):
     return r
 
 
-def MakeZeroSO3mparts(b,k,tau,_dev=0):
+def MakeZeroSO3mparts(b,k,tau,device='cpu'):
     R = []
     for l in range(0, len(tau)):
-        R.append(torch.zeros([b,k,2*l+1,tau[l]],dtype=torch.cfloat))
+        R.append(torch.zeros([b,k,2*l+1,tau[l]],dtype=torch.cfloat,device=device))
     return R
 
 
-def makeZeroSO3Fmparts(b,k,maxl,_dev=0):
+def makeZeroSO3Fmparts(b,k,maxl,device='cpu'):
     R = []
     for l in range(0, maxl+1):
-        R.append(torch.zeros([b,k,2*l+1,2*l+1],dtype=torch.cfloat))
+        R.append(torch.zeros([b,k,2*l+1,2*l+1],dtype=torch.cfloat,device=device))
     return R
 
 
@@ -9,6 +9,8 @@
 
 import torch
 from cnine import ctensorb 
+from cnine import rtensor 
+import gelib_base
 from gelib_base import SO3partB as _SO3partB
 
 
@@ -24,6 +26,9 @@ class SO3part(torch.Tensor):
     is m=-l,...,l, and the third index is the fragment index. 
     """
 
+    # If set, CGproduct accepts half or bfloat16 parts (see lowp) and accumulates the product in single precision
+    inference_mode = False
+
     def __init__(self, _T):
         self=_T
         #super().__init__()
@@ -31,58 +36,85 @@ class SO3part(torch.Tensor):
     # ---- Static constructors -----------------------------------------------------------------------------
 
     @classmethod
-    def zeros(self, b, l, n, device='cpu'):
+    def zeros(self, b, l, n, device='cpu', dtype=torch.float):
         """
         Create an SO(3)-part consisting of b lots of n vectors transforming according to the l'th irrep of SO(3).
         The vectors are initialized to zero, resulting in an b*(2+l+1)*n dimensional complex tensor of zeros.
+        If dtype is torch.half or torch.bfloat16 the part is stored in low precision as a real b*(2l+1)*n*2 tensor,
+        other dtypes than these and torch.float are not supported.
         """
+        if dtype in _lowp_dtypes:
+            return torch.zeros([b, 2*l+1, n,2],dtype=dtype,device=device).as_subclass(SO3part)
+        if dtype!=torch.float:
+            raise TypeError("SO3part can only be stored in torch.float, torch.half or torch.bfloat16 precision.")
         return torch.view_as_complex(SO3part(torch.zeros([b, 2*l+1, n,2],device=device)))
 
     @classmethod
-    def randn(self, b, l, n, device='cpu'):
+    def raw(self, b, l, n, device='cpu'):
         """
         Create an SO(3)-part consisting of b lots of n vectors transforming according to the l'th irrep of SO(3).
-        The vectors are initialized as random gaussian vectors, resulting in an b*(2+l+1)*n dimensional random
-        complex tensor.
+        The tensor is allocated but not initialized.
         """
-        return torch.view_as_complex(SO3part(torch.randn([b, 2*l+1, n,2],device=device)))
+        return torch.view_as_complex(SO3part(torch.empty([b, 2*l+1, n,2],device=device)))
 
     @classmethod
-    def spharm(self, l, x, y, z, device='cpu'):
+    def randn(self, b, l, n, device='cpu', dtype=torch.float):
         """
-        Return the spherical harmonics of the vector (x,y,z)
+        Create an SO(3)-part consisting of b lots of n vectors transforming according to the l'th irrep of SO(3).
+        The vectors are initialized as random gaussian vectors, resulting in an b*(2+l+1)*n dimensional random
+        complex tensor. If dtype is torch.half or torch.bfloat16 the part is stored in low precision as a real 
+        b*(2l+1)*n*2 tensor, other dtypes than these and torch.float are not supported.
         """
-        R = SO3part.zeros(1, l, 1, device=device)
-        _SO3partB.view(R).add_spharm(x, y, z)
-        return R
+        if dtype in _lowp_dtypes:
+            return torch.randn([b, 2*l+1, n,2],dtype=dtype,device=device).as_subclass(SO3part)
+        if dtype!=torch.float:
+            raise TypeError("SO3part can only be stored in torch.float, torch.half or torch.bfloat16 precision.")
+        return torch.view_as_complex(SO3part(torch.randn([b, 2*l+1, n,2],device=device)))
 
     @classmethod
-    def spharm(self, l, X, device='cpu'):
+    def spharm(self, l, *args, device='cpu'):
         """
-        Return the spherical harmonics of the vector (x,y,z)
+        Return the spherical harmonics of the vector (x,y,z), called as spharm(l,x,y,z), 
+        or of each column of the b x 3 x n tensor X, called as spharm(l,X).
         """
+        if torch.is_tensor(args[0]) and args[0].dim()>0:
+            if args[0].dim()!=3 or len(args)>2:
+                raise ValueError("spharm(l,X) requires X to be a b x 3 x n tensor, use spharmB for b x 3 matrices.")
+            return SO3part._spharm_X(l, args[0], device=(args[1] if len(args)>1 else device))
+        if len(args) not in (3,4):
+            raise TypeError("spharm must be called as spharm(l,X) or spharm(l,x,y,z).")
+        return SO3part._spharm_xyz(l, args[0], args[1], args[2], device=(args[3] if len(args)>3 else device))
+
+    @classmethod
+    def _spharm_xyz(self, l, x, y, z, device='cpu'):
+        R = _host_zeros(1, l, 1, device)
+        _SO3partB.view(R).add_spharm(float(x), float(y), float(z))
+        return R.to(device, non_blocking=True)
+
+    @classmethod
+    def _spharm_X(self, l, X, device='cpu'):
         assert(X.dim()==3)
-        R = SO3part.zeros(X.size(0), l, X.size(2), device=device)
-        _SO3partB.view(R).add_spharm(X)
-        return R
+        R = _host_zeros(X.size(0), l, X.size(2), device)
+        _SO3partB.view(R).add_spharm(X.cpu())
+        return R.to(device, non_blocking=True)
 
     @classmethod
     def spharmB(self, l, X, device='cpu'):
         """
         Return the spherical harmonics of each row of the matrix X.
         """
-        R = SO3part.zeros(X.size(0), l, 1, device=device)
-        _SO3partB.view(R).add_spharmB(X)
-        return R
+        R = _host_zeros(X.size(0), l, 1, device)
+        _SO3partB.view(R).add_spharmB(X.cpu())
+        return R.to(device, non_blocking=True)
 
     @classmethod
     def spharM(self, b, l, n, x, y, z, device='cpu'):
         """
         Return the spherical harmonics of the vector (x,y,z)
         """
-        R = SO3part.zeros(b, l, n, device=device)
+        R = _host_zeros(b, l, n, device)
         _SO3partB.view(R).add_spharm(x, y, z)
-        return R
+        return R.to(device, non_blocking=True)
 
     @classmethod
     def Fzeros(self, b, l, device='cpu'):
@@ -107,6 +139,13 @@ class SO3part(torch.Tensor):
     @classmethod
     def randn_like(self,x):
         return torch.view_as_complex(SO3part(torch.randn_like(torch.view_as_real(x))))
+
+    @classmethod
+    def cat_batch(self, parts):
+        """
+        Concatenate a list of SO3parts with the same l and n along the batch dimension.
+        """
+        return torch.cat(parts,dim=0)
     
                    
     # ---- Access ------------------------------------------------------------------------------------------
@@ -116,16 +155,31 @@ class SO3part(torch.Tensor):
         return self.size(0)
 
     def getl(self):
-        return (self.size(1)-1)/2
+        return (self.size(1)-1)//2
 
     def getn(self):
         return self.size(2)
 
+    def lowp(self, dtype=torch.bfloat16):
+        """
+        Return a copy of this SO3part stored in half or bfloat16 precision as a real b*(2l+1)*n*2 tensor.
+        """
+        assert(dtype in _lowp_dtypes)
+        return torch.view_as_real(self).to(dtype).as_subclass(SO3part)
+
+    def split_batch(self, sizes):
+        """
+        Split this SO3part along the batch dimension into parts with batch sizes given by the list sizes.
+        The parts are views into this SO3part.
+        """
+        return list(torch.split(self,sizes,dim=0))
+
 
     # ---- Operations --------------------------------------------------------------------------------------
 
 
     def rotate(self, R):
+        _check_complex(self)
         A = _SO3partB.view(self).apply(R)
         return torch.view_as_complex(SO3part(torch.view_as_real(A.torch())))
 
@@ -137,20 +191,59 @@ class SO3part(torch.Tensor):
 
 
     def odot(self,y):
+            _check_complex(self,y)
             return torch.sum(torch.mul(torch.view_as_real(self),torch.view_as_real(y)))
 
     def CGproduct(self, y, l):
         """
         Compute the l component of the Clesbsch--Gordan product of this SO3part with another SO3part y.
         """
+        if SO3part.inference_mode and self.dtype in _lowp_dtypes:
+            return SO3part_CGproduct_mixed(self,y,l)
+        _check_complex(self,y)
         return SO3part_CGproductFn.apply(self,y,l)
 
+    @classmethod
+    def CGproduct_batched(self, xs, ys, l):
+        """
+        Compute the l component of the Clesbsch--Gordan products of the corresponding SO3parts in the lists 
+        xs and ys with a single call to the CG product by concatenating them along the batch dimension.
+        """
+        assert(len(xs)==len(ys))
+        sizes=[x.size(0) for x in xs]
+        assert(sizes==[y.size(0) for y in ys])
+        _check_complex(*xs,*ys)
+        r=SO3part_CGproductFn.apply(SO3part.cat_batch(xs),SO3part.cat_batch(ys),l)
+        return SO3part.split_batch(r,sizes)
+
     def DiagCGproduct(self, y, l):
         """
         Compute the l component of the diagonal Clesbsch--Gordan product of this SO3part with another SO3part y.
         """
+        _check_complex(self,y)
         return SO3part_DiagCGproductFn.apply(self,y,l)
 
+    def CGproduct_eaas(self, y, l, R):
+        """
+        Compute the l component of the Clesbsch--Gordan product of this SO3part with an SO3part y that is 
+        axially symmetric about the axis that the rotation R takes the z axis to, e.g., the spherical harmonics 
+        of a vector pointing along that axis. Both arguments are rotated into the frame where the axis is z, 
+        where y only has an m=0 component and the product reduces to a sparse reindexing of x, 
+        and the result is rotated back.
+        """
+        l1=self.getl()
+        l2=y.getl()
+        assert(l>=abs(l1-l2) and l<=l1+l2)
+        b=self.size(0)
+        idx,coef=EAAS_tables(l1,l2,l,self.device)
+        D1,D2,D=WignerDs([l1,l2,l],R,self.device)
+
+        x=torch.einsum('ji,bjn->bin',D1.conj(),self)
+        y0=torch.einsum('j,bjn->bn',D2[:,l2].conj(),y)
+        r=(x[:,idx,:]*coef.view(1,-1,1)).unsqueeze(3)*y0.view(b,1,1,-1)
+        r=r.reshape(b,2*l+1,-1)
+        return torch.einsum('ij,bjn->bin',D,r)
+
 
     # ---- I/O ----------------------------------------------------------------------------------------------
 
@@ -176,13 +269,22 @@ class SO3part_CGproductFn(torch.autograd.Function):
         ctx.save_for_backward(x,y)
 
         b = x.size(0)
-        r = SO3part.zeros(b,l,x.size(2)*y.size(2),x.device)
-
         _x = _SO3partB.view(x)
         _y = _SO3partB.view(y)
-        _r = _SO3partB.view(r)
-        _r.addCGproduct(_x,_y)
 
+        # on the CPU the output is written directly, so it does not need to be zeroed first
+        if x.is_cuda:
+            r = SO3part.zeros(b,l,x.size(2)*y.size(2),device=x.device)
+            _r = _SO3partB.view(r)
+            _r.addCGproduct(_x,_y)
+        else:
+            r = SO3part.raw(b,l,x.size(2)*y.size(2),device=x.device)
+            _r = _SO3partB.view(r)
+            _r.setCGproduct(_x,_y)
+
+        # the views are only reused in backward if the saved tensors still live at the same address
+        ctx._x_view=(_x,x.data_ptr())
+        ctx._y_view=(_y,y.data_ptr())
         return r
 
     @staticmethod
@@ -190,18 +292,14 @@ class SO3part_CGproductFn(torch.autograd.Function):
 
         x,y = ctx.saved_tensors
 
-        xg=torch.zeros_like(x)
-        yg=torch.zeros_like(y)
-
-        _x = _SO3partB.view(x)
-        _y = _SO3partB.view(y)
+        xg,_xg = _SO3partB.zeros_like_view(x)
+        yg,_yg = _SO3partB.zeros_like_view(y)
 
+        _x = _saved_view(ctx._x_view,x)
+        _y = _saved_view(ctx._y_view,y)
         _g = _SO3partB.view(g)
-        _xg = _SO3partB.view(xg)
-        _yg = _SO3partB.view(yg)
 
-        _xg.addCGproduct_back0(_g, _y)
-        _yg.addCGproduct_back1(_g, _x)
+        _SO3partB.addCGproduct_back(_xg, _yg, _g, _x, _y)
 
         return xg,yg,None
 
@@ -214,14 +312,17 @@ class SO3part_DiagCGproductFn(torch.autograd.Function):
         assert x.size(2)==y.size(2)
         ctx.save_for_backward(x,y)
 
-        b = x.size(0)
-        r = SO3part.zeros(b,l,x.size(2),x.device)
-
         _x = _SO3partB.view(x)
         _y = _SO3partB.view(y)
+
+        b = x.size(0)
+        r = SO3part.zeros(b,l,x.size(2),device=x.device)
         _r = _SO3partB.view(r)
         _r.addDiagCGproduct(_x,_y)
 
+        # the views are only reused in backward if the saved tensors still live at the same address
+        ctx._x_view=(_x,x.data_ptr())
+        ctx._y_view=(_y,y.data_ptr())
         return r
 
     @staticmethod
@@ -229,18 +330,14 @@ class SO3part_DiagCGproductFn(torch.autograd.Function):
 
         x,y = ctx.saved_tensors
 
-        xg=torch.zeros_like(x)
-        yg=torch.zeros_like(y)
-
-        _x = _SO3partB.view(x)
-        _y = _SO3partB.view(y)
+        xg,_xg = _SO3partB.zeros_like_view(x)
+        yg,_yg = _SO3partB.zeros_like_view(y)
 
+        _x = _saved_view(ctx._x_view,x)
+        _y = _saved_view(ctx._y_view,y)
         _g = _SO3partB.view(g)
-        _xg = _SO3partB.view(xg)
-        _yg = _SO3partB.view(yg)
 
-        _xg.addDiagCGproduct_back0(_g, _y)
-        _yg.addDiagCGproduct_back1(_g, _x)
+        _SO3partB.addDiagCGproduct_back(_xg, _yg, _g, _x, _y)
 
         return xg,yg,None
 
@@ -250,6 +347,94 @@ class SO3part_DiagCGproductFn(torch.autograd.Function):
 # ----------------------------------------------------------------------------------------------------------
 
 
+def _saved_view(cached,t):
+    """
+    Return the view cached in forward if the saved tensor t is still backed by the same storage. Under 
+    saved tensor hooks (e.g. non-reentrant checkpointing or save_on_cpu) t may be a recomputed or 
+    reloaded copy, in which case it is wrapped afresh.
+    """
+    view,ptr=cached
+    if t.data_ptr()==ptr:
+        return view
+    return _SO3partB.view(t)
+
+
+_lowp_dtypes = (torch.float16, torch.bfloat16)
+
+
+def _check_complex(*args):
+    """
+    Raise a TypeError unless all arguments are complex single precision parts. Low precision parts are real 
+    [b,2l+1,n,2] tensors that the GElib kernels cannot view, they are only accepted by CGproduct in 
+    SO3part.inference_mode.
+    """
+    for t in args:
+        if t.dtype in _lowp_dtypes:
+            raise TypeError("Operations on "+str(t.dtype)+" SO3parts are only supported by CGproduct with "+
+                            "SO3part.inference_mode set.")
+        if t.dtype!=torch.cfloat:
+            raise TypeError("Expected a torch.cfloat SO3part, got "+str(t.dtype)+".")
+
+
+def SO3part_CGproduct_mixed(x,y,l):
+    """
+    CG-product of two SO3parts stored in half or bfloat16 precision, accumulated and returned in single precision.
+    Not differentiable. On the GPU the arguments are converted to single precision before the product.
+    """
+    if y.dtype!=x.dtype:
+        raise TypeError("The arguments of a mixed precision CG-product must have the same dtype, got "+
+                        str(x.dtype)+" and "+str(y.dtype)+".")
+    b = x.size(0)
+    r = SO3part.zeros(b,l,x.size(2)*y.size(2),device=x.device)
+    if x.is_cuda:
+        _x = _SO3partB.view(torch.view_as_complex(x.float()))
+        _y = _SO3partB.view(torch.view_as_complex(y.float()))
+        _SO3partB.view(r).addCGproduct(_x,_y)
+    else:
+        _SO3partB.view(r).addCGproduct_mixed(x.as_subclass(torch.Tensor),y.as_subclass(torch.Tensor))
+    return r
+
+
+def _host_zeros(b,l,n,device='cpu'):
+    """
+    Zero SO3part in host memory for results that are computed on the host but are destined for device. 
+    If device is a GPU the buffer is pinned so that the upload with non_blocking=True is asynchronous.
+    """
+    pin=torch.device(device).type=='cuda'
+    return torch.view_as_complex(SO3part(torch.zeros([b, 2*l+1, n, 2], pin_memory=pin)))
+
+
+_eaas_tables={}
+
+def EAAS_tables(l1,l2,l,device='cpu'):
+    """
+    Return the row index and coefficient tables of the axis aligned CG product of an l1 part with the m=0 
+    component of an l2 part. Row m of the l output is coef[m+l] times row idx[m+l] of the l1 input. 
+    """
+    key=(l1,l2,l,str(device))
+    if key not in _eaas_tables:
+        C=torch.zeros(2*l1+1,2*l2+1)
+        gelib_base.add_CGmatrix_to(rtensor.view(C),l1,l2,l)
+        idx=torch.zeros(2*l+1,dtype=torch.int64)
+        coef=torch.zeros(2*l+1,dtype=torch.cfloat)
+        for m in range(-min(l1,l),min(l1,l)+1):
+            idx[m+l]=m+l1
+            coef[m+l]=C[m+l1,l2]
+        _eaas_tables[key]=(idx.to(device),coef.to(device))
+    return _eaas_tables[key]
+
+
+def WignerDs(ls,R,device='cpu'):
+    """
+    Return the Wigner matrices of the SO3element R for each l in ls. The matrices are computed on the host 
+    and moved to device together in a single copy.
+    """
+    Ds=[SO3part.rotate(torch.eye(2*l+1,dtype=torch.cfloat).unsqueeze(0),R)[0] for l in ls]
+    buf=torch.cat([D.reshape(-1) for D in Ds]).to(device)
+    return [v.view(2*l+1,2*l+1) for l,v in zip(ls,torch.split(buf,[(2*l+1)**2 for l in ls]))]
+
+
+
 def CGproduct(x, y, maxl=-1):
     return x.CGproduct(y, maxl)
 
@@ -59,19 +59,19 @@ class SO3partB(torch.Tensor):
     @classmethod
     def Fraw(self, b, l, _dev=0):
         r=SO3partB([1])
-        r.obj=_SO3partB.Fraw(b,l,n,_dev)
+        r.obj=_SO3partB.Fraw(b,l,_dev)
         return r
 
     @classmethod
-    def Fzeros(self, b, l, n, _dev=0):
+    def Fzeros(self, b, l, _dev=0):
         r=SO3partB([1])
-        r.obj=_SO3partB.Fzero(b,l,n,_dev)
+        r.obj=_SO3partB.Fzero(b,l,_dev)
         return r
 
     @classmethod
-    def Frandn(self, b, l, n, _dev=0):
+    def Frandn(self, b, l, _dev=0):
         r=SO3partB([1])
-        r.obj=_SO3partB.Fgaussian(b,l,n,_dev)
+        r.obj=_SO3partB.Fgaussian(b,l,_dev)
         return r
 
     @classmethod
@@ -67,6 +67,18 @@ class SO3vec:
             R.parts.append(SO3part.spharM(b, l, _tau[l], x, y, z, device=device))
         return R
 
+    @classmethod
+    def spharm_upto(self, maxl, X, device='cpu'):
+        """
+        Compute the spherical harmonics of each column of the b x 3 x n tensor X for l=0,1,...,maxl in a single pass. 
+        The l'th part of the result is of size b x (2l+1) x n.
+        """
+        assert(X.dim()==3)
+        pin = torch.device(device).type=='cuda'
+        R = SO3vec([torch.zeros([X.size(0),2*l+1,X.size(2)], dtype=torch.cfloat, pin_memory=pin) for l in range(maxl+1)])
+        _SO3vecB.view(R.parts).add_spharm(X.cpu())
+        return R.to(device, non_blocking=True)
+
     @classmethod
     def Fzeros(self, b, maxl,  device='cpu'):
         "Construct an SO3vec corresponding the to the Forier matrices 0,1,...maxl of b functions on SO(3)."
@@ -84,6 +96,13 @@ class SO3vec:
             #R.parts.append(SO3part.Frandn(b, l, _dev))
         return R
 
+    @classmethod
+    def from_packed(self, buf, _tau):
+        "Construct an SO3vec of type _tau whose parts are views into a packed [b,sum_l (2l+1)*_tau[l]] tensor."
+        R = SO3vec()
+        R.parts = unpackSO3parts(buf, _tau)
+        return R
+
     @classmethod
     def zeros_like(self, x):
         R = SO3vec()
@@ -112,6 +131,15 @@ class SO3vec:
             r.append(self.parts[l].size(2))
         return r
 
+    def packed(self):
+        """
+        Return the parts of the SO3vec concatenated into a single b*(sum_l (2l+1)*tau[l]) dimensional tensor,
+        together with the type tau, so that SO3vec.from_packed(*x.packed()) reconstructs x.
+        """
+        b = self.getb()
+        buf = torch.cat([p.reshape(b,-1) for p in self.parts], 1)
+        return buf, self.tau()
+
     def requires_grad_(self):
         for p in self.parts:
             p.requires_grad_()
@@ -127,10 +155,10 @@ class SO3vec:
     # ---- Transport ---------------------------------------------------------------------------------------
 
 
-    def to(self, device):
+    def to(self, device, non_blocking=False):
         r = SO3vec()
         for p in self.parts:
-            r.parts.append(p.to(device))
+            r.parts.append(p.to(device, non_blocking=non_blocking))
         return r
 
 
@@ -450,13 +478,12 @@ class SO3vec_iFFTFn(torch.autograd.Function):
     def backward(ctx, fg):
 
         inputs = ctx.saved_tensors
-        grads = [None]
-        for inp in inputs:
-            grads.append(torch.zeros_like(inp))
+        tau = tau_type(inputs)
+        offsets = packed_offsets(tau)
+        vg = torch.zeros([inputs[0].size(0),offsets[-1]],dtype=inputs[0].dtype,device=inputs[0].device)
+        grads = [None]+unpackSO3parts(vg, tau)
 
-        _fg = ctensorb.view(fg)
-        _vg=_SO3vecB.view(grads[1:])
-        _vg.add_FFT(_fg)
+        _SO3vecB.add_FFT_packed(vg,fg,offsets)
         
         return tuple(grads)
 
@@ -467,22 +494,29 @@ class SO3vec_FFTFn(torch.autograd.Function):
     def forward(ctx, maxl, f):
 
         ctx.save_for_backward(f)
-        _f = ctensorb.view(f)
 
-        v = makeZeroSO3Fparts(_f.get_dim(0), maxl, _f.get_dev())
-        _v=_SO3vecB.view(v)
-        _v.add_FFT(_f)
+        tau = [2*l+1 for l in range(maxl+1)]
+        offsets = packed_offsets(tau)
+        v = torch.zeros([f.size(0),offsets[-1]],dtype=torch.cfloat,device=f.device)
+        _SO3vecB.add_FFT_packed(v,f,offsets)
 
-        return tuple(v)
+        ctx.offsets = offsets
+        return tuple(unpackSO3parts(v, tau))
 
     @staticmethod
-    def backward(ctx, vg):
+    def backward(ctx, *vg):
 
-        inputs = ctx.saved_tensors
+        f, = ctx.saved_tensors
+        b = f.size(0)
+
+        # parts that did not contribute to the loss come back as None
+        vg = [g.reshape(b,-1) if g is not None else
+              torch.zeros([b,ctx.offsets[l+1]-ctx.offsets[l]],dtype=torch.cfloat,device=f.device)
+              for l,g in enumerate(vg)]
+        vg = torch.cat(vg,1)
 
-        fg=torch.zeros_like(inputs[0])
-        _fg=ctensorb.view(fg)
-        _vg.add_iFFT_to(_fg)
+        fg=torch.zeros_like(f)
+        _SO3vecB.add_iFFT_to_packed(vg,fg,ctx.offsets)
         
         return tuple([None, fg])
 
@@ -567,6 +601,22 @@ def makeZeroSO3Fparts(b, maxl, device):
     return R
 
 
+def packed_offsets(tau):
+    r = [0]
+    for l in range(0, len(tau)):
+        r.append(r[l]+(2*l+1)*tau[l])
+    return r
+
+
+def unpackSO3parts(buf, tau):
+    b = buf.size(0)
+    offsets = packed_offsets(tau)
+    R = []
+    for l in range(0, len(tau)):
+        R.append(buf[:,offsets[l]:offsets[l+1]].view(b,2*l+1,tau[l]))
+    return R
+
+
 def SO3FFT(f,maxl):
     r=SO3vec()
     r.parts=list(SO3vec_FFTFn.apply(maxl,f))
@@ -21,10 +21,7 @@ from gelib import *
 
 
 def WignerMatrix(l,phi,theta,psi,_dev=0):
-    if _dev==0:
-        r=torch.zeros(2*l+1,2*l+1,dtype=torch.cfloat)
-    else:
-        r=torch.zeros(2*l+1,2*l+1,dtype=torch.cfloat).cuda()
+    r=torch.zeros(2*l+1,2*l+1,dtype=torch.cfloat,device=('cuda' if _dev>0 else 'cpu'))
     _r=ctensorb.view(r)
     gelib_base.add_WignerMatrix_to(_r,l,phi,theta,psi)
     return r
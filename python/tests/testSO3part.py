@@ -1,6 +1,7 @@
 import torch
 import gelib as G
 import pytest
+from gelib_base import SO3partB as _SO3partB
 
 class TestSO3part(object):
     
@@ -62,6 +63,43 @@ class TestSO3part(object):
         assert torch.allclose(rz,zr,rtol=1e-3, atol=1e-5)
 
 
+    @pytest.mark.parametrize('l1', [0, 1, 2])
+    @pytest.mark.parametrize('l2', [1, 2, 3])
+    @pytest.mark.parametrize('n', [1, 3, 9])
+    def test_CGproduct_planar(self,l1,l2,n):
+        planar = lambda z: torch.stack([z.real,z.imag]).contiguous()
+        b = 2
+        x = G.SO3part.randn(b,l1,n)
+        y = G.SO3part.randn(b,l2,n)
+        for l in range(abs(l1-l2),l1+l2+1):
+            r = G.SO3part.zeros(b,l,n*n)
+            _SO3partB.view(r).addCGproduct(_SO3partB.view(x),_SO3partB.view(y))
+            rp = torch.zeros(2,b,2*l+1,n*n)
+            _SO3partB.addCGproduct_planar(rp,planar(x),planar(y))
+            assert torch.allclose(rp,planar(r),rtol=1e-3, atol=1e-5)
+
+            g = G.SO3part.randn(b,l,n*n)
+            xg = G.SO3part.zeros(b,l1,n)
+            _SO3partB.view(xg).addCGproduct_back0(_SO3partB.view(g),_SO3partB.view(y))
+            xgp = torch.zeros(2,b,2*l1+1,n)
+            _SO3partB.addCGproduct_back0_planar(xgp,planar(g),planar(y))
+            assert torch.allclose(xgp,planar(xg),rtol=1e-3, atol=1e-5)
+
+            yg = G.SO3part.zeros(b,l2,n)
+            _SO3partB.view(yg).addCGproduct_back1(_SO3partB.view(g),_SO3partB.view(x))
+            ygp = torch.zeros(2,b,2*l2+1,n)
+            _SO3partB.addCGproduct_back1_planar(ygp,planar(g),planar(x))
+            assert torch.allclose(ygp,planar(yg),rtol=1e-3, atol=1e-5)
+
+
+    @pytest.mark.skipif(not torch.cuda.is_available(), reason="requires a GPU")
+    def test_CGproduct_planar_cuda(self):
+        x = torch.randn(2,1,3,4,device='cuda')
+        r = torch.zeros(2,1,3,16,device='cuda')
+        with pytest.raises(RuntimeError):
+            _SO3partB.addCGproduct_planar(r,x,x)
+
+
     @pytest.mark.parametrize('b', [1, 2, 4])    
     @pytest.mark.parametrize('l', [1, 2, 4, 8])
     @pytest.mark.parametrize('n', [1, 2, 4, 8, 32])
@@ -76,3 +114,119 @@ class TestSO3part(object):
         self.part_part_backprop(b,l,n,G.DiagCGproduct,l)
 
 
+    @pytest.mark.parametrize('fn', [G.CGproduct, G.DiagCGproduct])
+    @pytest.mark.parametrize('l', [1, 2])
+    def test_backprop_checkpoint(self,fn,l):
+        from torch.utils.checkpoint import checkpoint
+        x = G.SO3part.randn(2,l,4)
+        y = G.SO3part.randn(2,l,4)
+        test_vec = G.SO3part.randn_like(fn(x,y,l))
+
+        # the arguments of the product are intermediates, so recomputation allocates them afresh
+        def region(x,y):
+            return fn(x*1.5,y*0.5,l)
+
+        grads=[]
+        for use_checkpoint in [False, True]:
+            xc = x.clone().requires_grad_()
+            yc = y.clone().requires_grad_()
+            z = checkpoint(region,xc,yc,use_reentrant=False) if use_checkpoint else region(xc,yc)
+            z.odot(test_vec).backward(torch.tensor(1.0))
+            grads.append((xc.grad,yc.grad))
+
+        assert torch.allclose(grads[0][0],grads[1][0],rtol=1e-3, atol=1e-5)
+        assert torch.allclose(grads[0][1],grads[1][1],rtol=1e-3, atol=1e-5)
+
+
+    @pytest.mark.parametrize('b', [1, 2])    
+    @pytest.mark.parametrize('l1', [0, 1, 2, 4])
+    @pytest.mark.parametrize('l2', [1, 2, 3])
+    @pytest.mark.parametrize('n', [1, 4])
+    def test_CGproduct_eaas(self,b,l1,l2,n):
+        R = G.SO3element.uniform()
+        x = G.SO3part.randn(b,l1,n)
+        y0 = G.SO3part.zeros(b,l2,n)
+        y0[:,l2,:] = torch.randn(b,n,dtype=torch.cfloat)
+        y = y0.rotate(R)
+
+        for l in range(abs(l1-l2),l1+l2+1):
+            z = G.CGproduct(x,y,l)
+            ze = x.CGproduct_eaas(y,l,R)
+            assert torch.allclose(z,ze,rtol=1e-3, atol=1e-4)
+
+
+    @pytest.mark.parametrize('l', [1, 2, 4])
+    @pytest.mark.parametrize('n', [1, 4])
+    def test_CGproduct_batched(self,l,n):
+        xs = [G.SO3part.randn(b,l,n) for b in [1,2,3]]
+        ys = [G.SO3part.randn(b,l,n) for b in [1,2,3]]
+        zs = G.SO3part.CGproduct_batched(xs,ys,l)
+        assert len(zs)==3
+        for x,y,z in zip(xs,ys,zs):
+            assert torch.allclose(z,G.CGproduct(x,y,l),rtol=1e-3, atol=1e-5)
+
+
+    @pytest.mark.parametrize('dtype', [torch.float16, torch.bfloat16])
+    @pytest.mark.parametrize('l', [1, 2, 4])
+    def test_CGproduct_mixed(self,dtype,l):
+        x = G.SO3part.randn(2,l,4).lowp(dtype)
+        y = G.SO3part.randn(2,l,4).lowp(dtype)
+        z = G.CGproduct(torch.view_as_complex(x.float()),torch.view_as_complex(y.float()),l)
+        G.SO3part.inference_mode = True
+        try:
+            zm = G.CGproduct(x,y,l)
+        finally:
+            G.SO3part.inference_mode = False
+        assert zm.dtype==torch.cfloat
+        assert torch.allclose(z,zm,rtol=1e-3, atol=1e-4)
+
+
+    def test_unsupported_dtype(self):
+        with pytest.raises(TypeError):
+            G.SO3part.zeros(2,1,4,dtype=torch.float64)
+        with pytest.raises(TypeError):
+            G.SO3part.randn(2,1,4,dtype=torch.int32)
+
+        x = G.SO3part.randn(2,1,4)
+        xl = G.SO3part.randn(2,1,4,dtype=torch.bfloat16)
+        with pytest.raises(TypeError):
+            G.CGproduct(xl,xl,1)
+        with pytest.raises(TypeError):
+            G.DiagCGproduct(xl,xl,1)
+        with pytest.raises(TypeError):
+            xl.rotate(G.SO3element.uniform())
+        with pytest.raises(TypeError):
+            xl.odot(xl)
+        with pytest.raises(TypeError):
+            G.CGproduct(x,xl,1)
+        G.SO3part.inference_mode = True
+        try:
+            with pytest.raises(TypeError):
+                G.CGproduct(xl,x,1)
+            with pytest.raises(TypeError):
+                G.CGproduct(xl,x.lowp(torch.float16),1)
+        finally:
+            G.SO3part.inference_mode = False
+
+
+    @pytest.mark.parametrize('l', [0, 1, 2, 4, 8])
+    def test_spharm(self,l):
+        X = torch.randn(1,3,1)
+        z = G.SO3part.spharm(l,X)
+        zs = G.SO3part.spharm(l,X[0,0,0].item(),X[0,1,0].item(),X[0,2,0].item())
+        assert torch.allclose(z,zs,rtol=1e-3, atol=1e-5)
+
+
+    def test_spharm_bad_args(self):
+        with pytest.raises(ValueError):
+            G.SO3part.spharm(1,torch.randn(2,3))
+        with pytest.raises(TypeError):
+            G.SO3part.spharm(1,0.1,0.2)
+
+
+    def test_access(self):
+        x = G.SO3part.randn(2,3,4)
+        assert x.getb()==2
+        assert x.getl()==3
+        assert x.getn()==4
+        assert isinstance(x.getl(),int)
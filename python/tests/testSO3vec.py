@@ -1,3 +1,4 @@
+import math
 import torch
 import gelib as G
 import pytest
@@ -79,6 +80,27 @@ class TestSO3vec(object):
         for i in range(maxl+1 ):
             assert (torch.allclose(rz.parts[i] , zr.parts[i], rtol=1e-3, atol=1e-4))
 
+    @pytest.mark.parametrize('n', [1, 2, 8])
+    @pytest.mark.parametrize('maxl', range(7))
+    @pytest.mark.parametrize('b', [1, 2, 4])    
+    def test_spharm_upto(self,b,maxl,n):
+        X=torch.randn(b,3,n)
+        v=G.SO3vec.spharm_upto(maxl,X)
+
+        for l in range(maxl+1):
+            assert (torch.allclose(v.parts[l], G.SO3part.spharm(l,X), rtol=1e-3, atol=1e-5))
+
+    @pytest.mark.parametrize('maxl', range(7))
+    def test_spharm_upto_poles(self,maxl):
+        X=torch.tensor([[[0.0,0.0,0.0],[0.0,0.0,0.0],[1.0,-1.0,0.0]]])
+        v=G.SO3vec.spharm_upto(maxl,X)
+
+        for l in range(maxl+1):
+            p=G.SO3part.spharm(l,X)
+            assert (torch.allclose(v.parts[l], p, rtol=1e-3, atol=1e-5))
+            a=math.sqrt((2*l+1)/(4*math.pi))
+            assert abs(p[0,l,1].real.item()-(-1)**l*a)<1e-4
+
     @pytest.mark.parametrize('tau', [1, 2, 4, 8, 32])
     @pytest.mark.parametrize('maxl', range(7))
     @pytest.mark.parametrize('b', [1, 2, 4])    
@@ -98,3 +120,37 @@ class TestSO3vec(object):
     def test_Fproduct_backprop(self,b,maxl):
         self.vec_vec_backprop(b,[2*l+1 for l in range(maxl + 1)],G.Fproduct)
         return
+
+
+    @pytest.mark.parametrize('b', [1, 2])
+    @pytest.mark.parametrize('maxl', [1, 2, 3])
+    def test_FFT_backprop(self,b,maxl):
+        N = maxl+1
+        f = torch.randn([b,2*N,N,2*N,2])
+        f.requires_grad_()
+        v = G.SO3FFT(f,maxl)
+
+        test_vec = G.SO3vec.randn_like(v)
+        loss = v.odot(test_vec)
+        loss.backward(torch.tensor(1.0))
+
+        feps = torch.randn_like(f)
+        floss = G.SO3FFT(f+feps,maxl).odot(test_vec)
+        assert(torch.allclose(floss-loss,torch.sum(feps*f.grad),rtol=1e-3, atol=1e-4))
+
+
+    @pytest.mark.parametrize('b', [1, 2])
+    @pytest.mark.parametrize('tau', [[1], [2,3], [1,0,4]])
+    def test_packed(self,b,tau):
+        x = G.SO3vec.randn(b,tau)
+        buf,t = x.packed()
+        assert t==tau
+        y = G.SO3vec.from_packed(buf,t)
+        for l in range(len(tau)):
+            assert torch.equal(x.parts[l],y.parts[l])
+
+        offsets = G.packed_offsets(tau)
+        for l in range(len(tau)):
+            if tau[l]>0:
+                y.parts[l][b-1,0,0] = 7.0+l
+                assert buf[b-1,offsets[l]]==7.0+l
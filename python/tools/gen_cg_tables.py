@@ -0,0 +1,108 @@
+# This file is part of GElib, a C++/CUDA library for group
+# equivariant tensor operations. 
+# 
+# Copyright (c) 2022, Imre Risi Kondor
+#
+# This Source Code Form is subject to the terms of the Mozilla
+# Public License v. 2.0. If a copy of the MPL was not distributed
+# with this file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+# Generate a header with the Clebsch-Gordan coefficients of all (l1,l2,l) with l1,l2<=maxl as
+# compile time constants. The coefficients are computed with the same formula as SO3_CGcoeffs.
+
+import argparse
+import os
+from math import lgamma, exp, sqrt
+
+
+def logfact(n):
+    return lgamma(n+1)
+
+
+def plusminus(k):
+    return -1 if k%2==1 else 1
+
+
+def slowCG(l1, l2, l, m1, m2):
+    m=m1+m2
+    m3=-m
+    t1=l2-m1-l
+    t2=l1+m2-l
+    t3=l1+l2-l
+    t4=l1-m1
+    t5=l2+m2
+
+    tmin=max(0,max(t1,t2))
+    tmax=min(t3,min(t4,t5))
+
+    logA=(logfact(l1+l2-l)+logfact(l1-l2+l)+logfact(-l1+l2+l)-logfact(l1+l2+l+1))/2
+    logA+=(logfact(l1+m1)+logfact(l1-m1)+logfact(l2+m2)+logfact(l2-m2)+logfact(l+m3)+logfact(l-m3))/2
+
+    wigner=0
+    for t in range(tmin,tmax+1):
+        logB=logfact(t)+logfact(t-t1)+logfact(t-t2)+logfact(t3-t)+logfact(t4-t)+logfact(t5-t)
+        wigner+=plusminus(t)*exp(logA-logB)
+
+    return plusminus(l1-l2-m3)*plusminus(l1-l2+m)*sqrt(2*l+1)*wigner
+
+
+def triples(maxl):
+    for l1 in range(maxl+1):
+        for l2 in range(maxl+1):
+            for l in range(abs(l1-l2),l1+l2+1):
+                yield l1,l2,l
+
+
+def table(l1, l2, l):
+    r=[0.0]*((2*l1+1)*(2*l2+1))
+    for m1 in range(-l1,l1+1):
+        for m2 in range(max(-l2,-l-m1),min(l2,l-m1)+1):
+            r[(m1+l1)*(2*l2+1)+m2+l2]=slowCG(l1,l2,l,m1,m2)
+    return r
+
+
+def header(maxl):
+    out=[]
+    out.append("// This file is generated by python/tools/gen_cg_tables.py. Do not edit.\n")
+    out.append("#ifndef _SO3_CGtables")
+    out.append("#define _SO3_CGtables\n")
+    out.append("#define GELIB_CG_TABLES_MAXL "+str(maxl)+"\n")
+    out.append("#define GELIB_CG_TABLES_TRIPLES(CASE) \\")
+    out.append(" \\\n".join("  CASE("+str(l1)+","+str(l2)+","+str(l)+")" for l1,l2,l in triples(maxl))+"\n")
+    out.append("namespace GElib{\n")
+    out.append("  template<int L1, int L2, int L>")
+    out.append("  struct SO3_CGtable;\n")
+    for l1,l2,l in triples(maxl):
+        out.append("  template<>")
+        out.append("  struct SO3_CGtable<"+str(l1)+","+str(l2)+","+str(l)+">{")
+        out.append("    static inline float get(const int i1, const int i2){")
+        out.append("      static constexpr float t["+str((2*l1+1)*(2*l2+1))+"]={"+
+                   ",".join(repr(float("%.9g"%c))+"f" for c in table(l1,l2,l))+"};")
+        out.append("      return t[i1*"+str(2*l2+1)+"+i2];")
+        out.append("    }")
+        out.append("  };\n")
+    out.append("}\n")
+    out.append("#endif")
+    return "\n".join(out)+"\n"
+
+
+def main():
+    parser=argparse.ArgumentParser(description="Generate the compile time CG coefficient tables of GElib.")
+    parser.add_argument("--maxl",type=int,default=4)
+    parser.add_argument("--out",default="../include/SO3_CGtables.hpp")
+    args=parser.parse_args()
+    write_if_changed(args.out,header(args.maxl))
+
+
+def write_if_changed(path, text):
+    # leave the file and its mtime alone if nothing changed, so that the build does not recompile needlessly
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read()==text:
+                return
+    with open(path,"w") as f:
+        f.write(text)
+
+
+if __name__ == "__main__":
+    main()